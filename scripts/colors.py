@@ -1,48 +1,184 @@
-COLORS = {
-    "bg_primary": "#1f1f28",
-    "bg_secondary": "#16161d",
-    "fg_primary": "#dcd7ba",
-    "fg_secondary": "#727169",
-    "border": "#2a2a37",
-    "accent": "#7e9cd8",  # Default accent for unknown languages
-    "languages": {
-        "Python": "#ffa066",           # Muted warm orange (Kanagawa accent for Python)
-        "JavaScript": "#c0a36e",       # Muted gold/yellow (JS yellow)
-        "TypeScript": "#7e9cd8",       # Muted blue (TS blue logo)
-        "Java": "#d27e99",             # Muted reddish (Java's red/coffee tones)
-        "C": "#938aa9",                # Muted purple-grey (classic systems color)
-        "C++": "#938aa9",              # Muted purple (similar to C)
-        "C#": "#957fb8",               # Muted violet (C#'s purple logo)
-        "Go": "#7fb4ca",               # Muted cyan (Go's teal mascot)
-        "Rust": "#c8826b",             # Muted rust orange (Rust's orange logo)
-        "Ruby": "#c34043",             # Muted deep red (Ruby's red gem)
-        "PHP": "#938aa9",              # Muted purple-blue (PHP logo)
-        "Swift": "#d27e99",            # Muted coral-pink (Swift's orange tones)
-        "Kotlin": "#957fb8",           # Muted violet (Kotlin's purple/orange)
-        "Shell": "#98bb6c",            # Muted green (terminal green)
-        "Dart": "#7fb4ca",             # Muted teal-blue (Dart's blue logo)
-        "Scala": "#c8826b",            # Muted terracotta (Scala's red logo)
-        "R": "#7e9cd8",                # Muted blue (R's blue logo)
-        "Perl": "#938aa9",             # Muted purple-blue (Perl camel)
-        "Haskell": "#957fb8",          # Muted purple (Haskell's purple logo)
-        "Lua": "#7e9cd8",              # Muted blue (Lua's blue moon)
-        "Elixir": "#957fb8",           # Muted purple (Elixir's purple drop)
-        "Clojure": "#98bb6c",          # Muted green (Clojure's green logo)
-        "OCaml": "#c8826b",            # Muted orange (OCaml's camel)
-        "Vim Script": "#98bb6c",       # Muted green (Vim green)
-        "Makefile": "#c8826b",         # Muted orange-tan
-        "HTML": "#d27e99",             # Muted coral (HTML's orange)
-        "CSS": "#7e9cd8",              # Muted blue (CSS's blue)
-        "SCSS": "#d27e99",             # Muted pink (Sass pink)
-        "Vue": "#98bb6c",              # Muted green (Vue's green logo)
-        "Svelte": "#d27e99",           # Muted coral (Svelte's orange-red)
-        "Objective-C": "#7fb4ca",      # Muted cyan-blue
-        "Assembly": "#727169",         # Muted grey (low-level)
-        "Dockerfile": "#7fb4ca",       # Muted cyan (Docker's blue whale)
-        "YAML": "#c0a36e",             # Muted gold
-        "JSON": "#c0a36e",             # Muted gold
-        "Markdown": "#727169",         # Muted grey
-        "TeX": "#98bb6c",              # Muted green
-        "SQL": "#7e9cd8",              # Muted blue
-    },
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Final, NamedTuple
+
+__all__ = [
+    "BG_PRIMARY",
+    "BG_SECONDARY",
+    "FG_PRIMARY",
+    "FG_SECONDARY",
+    "BORDER",
+    "ACCENT",
+    "COLORS",
+    "COLORS_MAP",
+    "COLORS_RGB",
+    "COLORS_RGB_TUPLE",
+    "Palette",
+    "lang_color",
+]
+
+BG_PRIMARY: Final[str] = "#1f1f28"
+BG_SECONDARY: Final[str] = "#16161d"
+FG_PRIMARY: Final[str] = "#dcd7ba"
+FG_SECONDARY: Final[str] = "#727169"
+BORDER: Final[str] = "#2a2a37"
+ACCENT: Final[str] = "#7e9cd8"  # Default accent for unknown languages
+
+
+class Palette(NamedTuple):
+    bg_primary: str
+    bg_secondary: str
+    fg_primary: str
+    fg_secondary: str
+    border: str
+    accent: str  # Default accent for unknown languages
+    languages: Mapping[str, str]
+
+
+_LANG_COLORS = {
+    "Python": "#ffa066",           # Muted warm orange (Kanagawa accent for Python)
+    "JavaScript": "#c0a36e",       # Muted gold/yellow (JS yellow)
+    "TypeScript": "#7e9cd8",       # Muted blue (TS blue logo)
+    "Java": "#d27e99",             # Muted reddish (Java's red/coffee tones)
+    "C": "#938aa9",                # Muted purple-grey (classic systems color)
+    "C++": "#938aa9",              # Muted purple (similar to C)
+    "C#": "#957fb8",               # Muted violet (C#'s purple logo)
+    "Go": "#7fb4ca",               # Muted cyan (Go's teal mascot)
+    "Rust": "#c8826b",             # Muted rust orange (Rust's orange logo)
+    "Ruby": "#c34043",             # Muted deep red (Ruby's red gem)
+    "PHP": "#938aa9",              # Muted purple-blue (PHP logo)
+    "Swift": "#d27e99",            # Muted coral-pink (Swift's orange tones)
+    "Kotlin": "#957fb8",           # Muted violet (Kotlin's purple/orange)
+    "Shell": "#98bb6c",            # Muted green (terminal green)
+    "Dart": "#7fb4ca",             # Muted teal-blue (Dart's blue logo)
+    "Scala": "#c8826b",            # Muted terracotta (Scala's red logo)
+    "R": "#7e9cd8",                # Muted blue (R's blue logo)
+    "Perl": "#938aa9",             # Muted purple-blue (Perl camel)
+    "Haskell": "#957fb8",          # Muted purple (Haskell's purple logo)
+    "Lua": "#7e9cd8",              # Muted blue (Lua's blue moon)
+    "Elixir": "#957fb8",           # Muted purple (Elixir's purple drop)
+    "Clojure": "#98bb6c",          # Muted green (Clojure's green logo)
+    "OCaml": "#c8826b",            # Muted orange (OCaml's camel)
+    "Vim Script": "#98bb6c",       # Muted green (Vim green)
+    "Makefile": "#c8826b",         # Muted orange-tan
+    "HTML": "#d27e99",             # Muted coral (HTML's orange)
+    "CSS": "#7e9cd8",              # Muted blue (CSS's blue)
+    "SCSS": "#d27e99",             # Muted pink (Sass pink)
+    "Vue": "#98bb6c",              # Muted green (Vue's green logo)
+    "Svelte": "#d27e99",           # Muted coral (Svelte's orange-red)
+    "Objective-C": "#7fb4ca",      # Muted cyan-blue
+    "Assembly": "#727169",         # Muted grey (low-level)
+    "Dockerfile": "#7fb4ca",       # Muted cyan (Docker's blue whale)
+    "YAML": "#c0a36e",             # Muted gold
+    "JSON": "#c0a36e",             # Muted gold
+    "Markdown": "#727169",         # Muted grey
+    "TeX": "#98bb6c",              # Muted green
+    "SQL": "#7e9cd8",              # Muted blue
 }
+
+# Many languages share a color, so each distinct hex string is stored once in
+# _PALETTE and languages map to an index into it.
+_PALETTE = tuple(dict.fromkeys(_LANG_COLORS.values()))
+_PALETTE_SLOT = {color: i for i, color in enumerate(_PALETTE)}
+_LANG_INDEX = {
+    sys.intern(name): _PALETTE_SLOT[color] for name, color in _LANG_COLORS.items()
+}
+
+# Alternate spellings seen in GitHub data and user config, keyed in lower case.
+_LANG_ALIASES = {
+    "bash": "Shell",
+    "sh": "Shell",
+    "golang": "Go",
+    "js": "JavaScript",
+    "ts": "TypeScript",
+    "py": "Python",
+    "objc": "Objective-C",
+    "vim": "Vim Script",
+    "viml": "Vim Script",
+    "vimscript": "Vim Script",
+    "docker": "Dockerfile",
+    "make": "Makefile",
+    "latex": "TeX",
+}
+
+_LANG_LOOKUP = {
+    **{sys.intern(name.lower()): index for name, index in _LANG_INDEX.items()},
+    **{sys.intern(alias): _LANG_INDEX[name] for alias, name in _LANG_ALIASES.items()},
+    **_LANG_INDEX,
+}
+
+
+class _LangView(Mapping):
+    """Read-only language -> hex color mapping backed by _PALETTE."""
+
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        return _PALETTE[_LANG_INDEX[name]]
+
+    def __iter__(self):
+        return iter(_LANG_INDEX)
+
+    def __len__(self):
+        return len(_LANG_INDEX)
+
+
+COLORS = Palette(
+    bg_primary=BG_PRIMARY,
+    bg_secondary=BG_SECONDARY,
+    fg_primary=FG_PRIMARY,
+    fg_secondary=FG_SECONDARY,
+    border=BORDER,
+    accent=ACCENT,
+    languages=_LangView(),
+)
+
+
+@lru_cache(maxsize=256)
+def _resolve(name):
+    return _LANG_LOOKUP.get(name.strip().lower())
+
+
+def lang_color(name):
+    """Return the hex color for a language, falling back to the accent color.
+
+    Exact names hit the lookup table directly; other casings and known aliases
+    (e.g. "c++", "VimL") are normalized once and memoized.
+    """
+    index = _LANG_LOOKUP.get(name)
+    if index is None:
+        index = _resolve(name)
+    return COLORS.accent if index is None else _PALETTE[index]
+
+
+# Legacy dict-style view for callers that still use COLORS["..."] lookups.
+COLORS_MAP = MappingProxyType(COLORS._asdict())
+
+
+def _hex_to_int(value):
+    """Parse a '#rrggbb' string into a packed 0xRRGGBB integer."""
+    return int(value[1:], 16)
+
+
+def _int_to_rgb(value):
+    """Split a packed 0xRRGGBB integer into an (r, g, b) tuple."""
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+def _convert(palette, fn):
+    theme = {
+        field: fn(getattr(palette, field))
+        for field in Palette._fields
+        if field != "languages"
+    }
+    theme["languages"] = MappingProxyType(
+        {name: fn(color) for name, color in palette.languages.items()}
+    )
+    return MappingProxyType(theme)
+
+
+# Colors pre-parsed once at import time so renderers never re-parse hex strings.
+COLORS_RGB = _convert(COLORS, _hex_to_int)
+COLORS_RGB_TUPLE = _convert(COLORS, lambda color: _int_to_rgb(_hex_to_int(color)))
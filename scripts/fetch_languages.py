@@ -1,45 +1,106 @@
+import argparse
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
 import json
 import os
 import sys
+import threading
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
 import requests
-from colors import COLORS
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from colors import COLORS, lang_color
+
+# CI passes everything through the environment, so only pay for python-dotenv
+# when there is actually a .env file (in the working directory or repo root).
+_ENV_FILE = next(
+    (
+        path
+        for path in (Path(".env"), Path(__file__).resolve().parent.parent / ".env")
+        if path.is_file()
+    ),
+    None,
+)
+if _ENV_FILE:
+    from dotenv import load_dotenv
 
-load_dotenv()
+    load_dotenv(_ENV_FILE)
 
 CACHE_FILE = Path(".contribution_cache.json")
+LANGUAGES_CACHE_FILE = Path(".languages_cache.json")
+REPOS_CACHE_FILE = Path(".repos_cache.json")
+TOTALS_CACHE_FILE = Path(".totals_cache.json")
 
 
-def _get_top_n(default: int = 6) -> int:
-    """Read TOP_LANGS from env, falling back to default (strictly backwards-compatible)."""
-    raw = os.getenv("TOP_LANGS", "").strip()
+def _get_env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read an integer env setting, falling back to default when unset or invalid."""
+    raw = os.getenv(name, "").strip()
     if not raw:
         return default
     try:
         value = int(raw)
-        if value <= 0:
+        if value < minimum:
             print(
-                f"Warning: TOP_LANGS must be positive, got {raw!r}. Falling back to {default}."
+                f"Warning: {name} must be at least {minimum}, got {raw!r}. "
+                f"Falling back to {default}."
             )
             return default
         return value
     except ValueError:
-        print(f"Warning: invalid TOP_LANGS value {raw!r}. Falling back to {default}.")
+        print(f"Warning: invalid {name} value {raw!r}. Falling back to {default}.")
         return default
 
 
+def _get_top_n(default: int = 6) -> int:
+    """Read TOP_LANGS from env, falling back to default (strictly backwards-compatible)."""
+    return _get_env_int("TOP_LANGS", default)
+
+
 USERNAME = os.getenv("GITHUB_USERNAME") or os.getenv("USERNAME")
+# Per-repository progress lines are only printed with VERBOSE=1 or --verbose.
+VERBOSE = os.getenv("VERBOSE", "").strip().lower() in ("1", "true", "yes")
 TOKEN = os.getenv("GH_TOKEN")
+# GH_TOKENS is an optional comma-separated pool of tokens for the same account;
+# requests rotate through it to spread the rate limit.
+TOKENS = [
+    token.strip()
+    for token in (os.getenv("GH_TOKENS") or TOKEN or "").split(",")
+    if token.strip()
+]
+TOKEN = TOKEN or (TOKENS[0] if TOKENS else None)
+# The GraphQL viewer query needs a token; USE_GRAPHQL=0 forces the REST path.
+_USE_GRAPHQL_RAW = os.getenv("USE_GRAPHQL", "1").strip().lower()
+USE_GRAPHQL = bool(TOKEN) and _USE_GRAPHQL_RAW not in ("0", "false", "no")
 TOP_N = _get_top_n(6)
 SVG_PATH = "assets/languages.svg"
+# Also write a pre-compressed assets/languages.svg.gz for static hosting.
+GZIP_OUTPUT = os.getenv("GZIP_OUTPUT", "").strip().lower() in ("1", "true", "yes")
+# Parallel GitHub requests when a token is available (CONCURRENCY env var).
+MAX_WORKERS = _get_env_int("CONCURRENCY", 8)
+# Years per aliased contributionsCollection query; one query for a long-lived
+# account's whole history risks GitHub's GraphQL timeouts.
+YEARS_PER_QUERY = 4
+# Aggregated language totals younger than this are reused without any API calls.
+CACHE_TTL_SECONDS = _get_env_int("CACHE_TTL_SECONDS", 6 * 60 * 60, minimum=0)
+RATE_LIMIT_RETRIES = 5
+MAX_RATE_LIMIT_WAIT = 900
+# Below this many remaining calls, pause until the window resets before the next one.
+RATE_LIMIT_FLOOR = 5
 
 EXCLUDED_LANGS_RAW = os.getenv("EXCLUDED_LANGS", "")
-EXCLUDED_LANGS = set(
+EXCLUDED_LANGS = frozenset(
     lang.strip().lower() for lang in EXCLUDED_LANGS_RAW.split(",") if lang.strip()
 )
 
@@ -49,25 +110,66 @@ if EXCLUDED_LANGS:
 API = "https://api.github.com"
 
 BASE_HEADERS = {
-    "User-Agent": "RepositoryScanner/1.0 (+https://github.com/mavantgarderc/RepositoryScanner)"
+    "Accept": "application/vnd.github+json",
+    "User-Agent": "RepositoryScanner/1.0 (+https://github.com/mavantgarderc/RepositoryScanner)",
 }
 if TOKEN:
     BASE_HEADERS["Authorization"] = f"token {TOKEN}"
 
+# One pooled session for every REST and GraphQL call so connections to
+# api.github.com are kept alive instead of re-handshaking per request.
+SESSION = requests.Session()
+SESSION.headers.update(BASE_HEADERS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        # Page and language fetches can each run MAX_WORKERS requests at once.
+        pool_maxsize=2 * MAX_WORKERS,
+        # Only transient 5xx errors are retried here; 403/429 rate limits are
+        # left to gh_request(), which needs the response to read the reset time.
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            # urllib3 would otherwise still retry any 429 carrying Retry-After.
+            respect_retry_after_header=False,
+            allowed_methods=["GET", "POST"],
+        ),
+    ),
+)
 
+GRAPHQL_URL = f"{API}/graphql"
+_GQL_HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+_CONTRIBUTION_FIELDS = """
+          totalCommitContributions
+          totalIssueContributions
+          totalPullRequestContributions
+          totalPullRequestReviewContributions
+          contributionCalendar {
+            totalContributions
+            weeks {
+              contributionDays {
+                date
+                contributionCount
+              }
+            }
+          }
+"""
+
+
+_CLASS_NAME_TABLE = str.maketrans({"#": "sharp", "+": "plus", " ": "", "-": "dash"})
+
+
+@lru_cache(maxsize=256)
 def lang_to_class(lang: str) -> str:
     """Normalize a language name into a safe CSS class name."""
-    return (
-        lang.lower()
-        .replace("#", "sharp")
-        .replace("+", "plus")
-        .replace(" ", "")
-        .replace("-", "dash")
-    )
+    return lang.lower().translate(_CLASS_NAME_TABLE)
 
 
-def get_repos():
-    """Fetch all repositories for the configured user.
+def iter_repos():
+    """Yield the configured user's active, non-fork repositories page by page.
 
     When GH_TOKEN is set, uses the authenticated /user/repos endpoint.
     When GH_TOKEN is not set, uses /users/{USERNAME}/repos and only public repos
@@ -79,9 +181,11 @@ def get_repos():
             "GH_TOKEN is not provided"
         )
 
-    repos = []
-    page = 1
+    total = 0
     per_page = 100
+    max_pages = 50
+    page_cache = load_json_cache(REPOS_CACHE_FILE)
+    new_page_cache = {}
 
     if TOKEN:
         endpoint = f"{API}/user/repos"
@@ -92,90 +196,574 @@ def get_repos():
 
     print(f"Fetching repositories for user: {who}")
 
-    while True:
+    def fetch_page(page):
         params = {
             "per_page": per_page,
             "page": page,
             "type": "owner",
             "sort": "updated",
         }
+        cached = page_cache.get(f"{endpoint}?page={page}")
+        # Entries written before rel="last" was recorded can't size the fan-out.
+        if cached and "last" not in cached:
+            cached = None
+        return conditional_get(endpoint, cached, params=params)
 
-        try:
-            r = requests.get(endpoint, params=params, headers=BASE_HEADERS, timeout=30)
-            r.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching repositories page {page}: {e}")
+    try:
+        first = fetch_page(1)
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching repositories page 1: {e}")
+        raise
+
+    # Page 1's Link header carries rel="last", so the remaining pages can all
+    # be requested at once instead of walking rel="next" one round trip at a time.
+    last_page = _page_number(first["last"]) or 1
+    if last_page > max_pages:
+        print(f"Warning: Reached maximum page limit ({max_pages})")
+        last_page = max_pages
+
+    workers = min(MAX_WORKERS if TOKEN else 1, last_page - 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(fetch_page, page) for page in range(2, last_page + 1)
+        ]
+
+        for page in range(1, last_page + 1):
             if page == 1:
-                raise
-            break
+                entry = first
+            else:
+                try:
+                    entry = futures[page - 2].result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching repositories page {page}: {e}")
+                    break
+
+            new_page_cache[f"{endpoint}?page={page}"] = entry
+            batch = entry["body"]
+            if not batch:
+                break
+
+            non_forks = [
+                repo
+                for repo in batch
+                if not repo["fork"] and not repo.get("archived", False)
+            ]
+            total += len(non_forks)
 
-        batch = r.json()
-        if not batch:
-            break
+            print(
+                f"Page {page}: {len(batch)} repos, {len(non_forks)} non-forks (active)"
+            )
+            yield from non_forks
 
-        non_forks = [
-            repo
-            for repo in batch
-            if not repo["fork"] and not repo.get("archived", False)
-        ]
-        repos.extend(non_forks)
+    save_json_cache(REPOS_CACHE_FILE, new_page_cache)
 
-        print(f"Page {page}: {len(batch)} repos, {len(non_forks)} non-forks (active)")
-        page += 1
+    print(f"Total repositories found: {total}")
 
-        if page > 50:
-            print("Warning: Reached maximum page limit (50)")
-            break
 
-    print(f"Total repositories found: {len(repos)}")
-    return repos
+_token_lock = threading.Lock()
+_token_cycle = itertools.cycle(TOKENS)
+_token_resets = {}
+
+
+def _next_token():
+    """Return the next GH_TOKENS entry that is not waiting on a rate-limit reset."""
+    with _token_lock:
+        now = time.time()
+        for _ in range(len(TOKENS)):
+            token = next(_token_cycle)
+            if _token_resets.get(token, 0) <= now:
+                return token
+    return None
+
+
+_resume_at = {}
+
+
+def _note_budget(resource, response):
+    """Remember to pause ``resource`` calls when the remaining budget runs low."""
+    remaining = response.headers.get("X-RateLimit-Remaining", "")
+    reset = response.headers.get("X-RateLimit-Reset", "")
+    if remaining.isdigit() and reset.isdigit() and int(remaining) < RATE_LIMIT_FLOOR:
+        _resume_at[resource] = int(reset) + 1
+
 
+def _wait_for_budget(resource):
+    """Sleep until the rate-limit window resets if the last response ran low."""
+    wait = _resume_at.get(resource, 0) - time.time()
+    if 0 < wait <= MAX_RATE_LIMIT_WAIT:
+        print(f"GitHub {resource} rate limit nearly used up, waiting {wait:.0f}s...")
+        time.sleep(wait)
 
-def get_language_data(repo):
-    """Fetch language data for a specific repository.
 
-    Works with or without GH_TOKEN. Without a token, only public repositories
-    are available and GitHub's unauthenticated rate limit will apply.
+def _rate_limit_wait(response, attempt):
+    """Seconds to wait before retrying a rate-limited response, or None."""
+    if response.status_code not in (403, 429):
+        return None
+
+    headers = response.headers
+    retry_after = headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return max(int(retry_after), 1)
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        return max(int(headers["X-RateLimit-Reset"]) - time.time() + 1, 1)
+    if response.status_code == 429:
+        return 2**attempt
+    # A 403 without rate-limit headers is a permission problem, not throttling.
+    return None
+
+
+def gh_request(method, url, **kwargs):
+    """Send a request through SESSION, sleeping through GitHub rate limits.
+
+    502/503/504 responses are retried with backoff by the session's Retry
+    adapter, which is configured to pass 403 and 429 through untouched (no
+    429 in status_forcelist, Retry-After ignored). Those rate-limit responses
+    are waited out here using Retry-After or X-RateLimit-Reset before trying
+    again, and calls pause ahead of time once fewer than RATE_LIMIT_FLOOR
+    remain. With several GH_TOKENS, requests rotate tokens and skip ones that
+    are exhausted.
     """
-    repo_name = repo.get("name", "<unknown>")
+    headers = dict(kwargs.pop("headers", None) or {})
+    rotate = len(TOKENS) > 1
+    # REST and GraphQL calls draw on separate rate-limit budgets.
+    resource = "graphql" if url == GRAPHQL_URL else "core"
+
+    for attempt in range(RATE_LIMIT_RETRIES):
+        token = _next_token() if rotate else None
+        if token:
+            headers["Authorization"] = f"token {token}"
+        else:
+            _wait_for_budget(resource)
+        response = SESSION.request(method, url, headers=headers, **kwargs)
+        if not token:
+            _note_budget(resource, response)
+
+        if token and response.headers.get("X-RateLimit-Remaining") == "0":
+            # Park the exhausted token until its reset and move straight on to
+            # the next one, if any is still available.
+            reset = int(response.headers.get("X-RateLimit-Reset", 0))
+            with _token_lock:
+                _token_resets[token] = reset
+            if response.status_code in (403, 429) and _next_token():
+                continue
+
+        wait = _rate_limit_wait(response, attempt)
+        if (
+            wait is None
+            or wait > MAX_RATE_LIMIT_WAIT
+            or attempt == RATE_LIMIT_RETRIES - 1
+        ):
+            return response
+        print(f"Rate limited by GitHub, retrying in {wait:.0f}s...")
+        time.sleep(wait)
+
+    return response
+
+
+def conditional_get(url, cached=None, params=None, timeout=30):
+    """GET a JSON resource, revalidating a cached copy with its ETag.
+
+    ``cached`` is a previous ``{"etag": ..., "body": ..., "next": ..., "last": ...}``
+    entry or None, where ``next``/``last`` are page URLs from the Link header.
+    Returns the fresh entry, or ``cached`` itself on 304 Not Modified, which
+    GitHub does not count against the rate limit. Raises on request errors.
+    """
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    r = gh_request("GET", url, params=params, headers=headers, timeout=timeout)
+    if r.status_code == 304 and cached:
+        return cached
+    r.raise_for_status()
+    return {
+        "etag": r.headers.get("ETag"),
+        "body": r.json(),
+        "next": r.links.get("next", {}).get("url"),
+        "last": r.links.get("last", {}).get("url"),
+    }
 
-    try:
-        r = requests.get(repo["languages_url"], headers=BASE_HEADERS, timeout=15)
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Warning: Could not fetch languages for {repo_name}: {e}")
-        return {}
 
+def _page_number(url):
+    """Return the ``page`` query parameter of a pagination URL, or None."""
+    if not url:
+        return None
+    page = parse_qs(urlsplit(url).query).get("page")
+    return int(page[0]) if page else None
 
-def aggregate_languages():
-    """Aggregate language statistics across all repositories."""
-    repos = get_repos()
-    totals = {}
 
-    print(f"Processing {len(repos)} repositories...")
+def fetch_language_data(repo, cached=None):
+    """Fetch a repository's language cache entry, raising on request errors."""
+    return conditional_get(repo["languages_url"], cached, timeout=15)
 
-    for i, repo in enumerate(repos, 1):
-        repo_name = repo["name"]
-        print(f"Processing {i}/{len(repos)}: {repo_name}")
 
-        try:
-            langs = get_language_data(repo)
-            for lang, size in langs.items():
-                if lang.lower() in EXCLUDED_LANGS:
-                    print(f"  Excluding {lang} from {repo_name}")
-                    continue
-                totals[lang] = totals.get(lang, 0) + size
-
-        except Exception as e:
-            print(f"Error processing {repo_name}: {e}")
+def iter_languages_rest(force=False, failed=None):
+    """Yield (repo_name, languages) using one REST call per repository.
+
+    Repositories whose pushed_at matches the on-disk cache reuse the cached
+    languages instead of calling the API again, unless ``force`` is set; the
+    request is then still revalidated with the cached ETag. Repositories that
+    could not be fetched are skipped and, if given, appended to ``failed``.
+    """
+    cache = load_json_cache(LANGUAGES_CACHE_FILE)
+    new_cache = {}
+
+    # Unauthenticated requests share a 60/hour budget, so only fan out with a token.
+    workers = MAX_WORKERS if TOKEN else 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Language requests are queued as each page of repositories arrives,
+        # so they overlap with the rest of the listing.
+        repos = []
+        jobs = []
+        for repo in iter_repos():
+            repos.append(repo)
+            cached = cache.get(repo["full_name"])
+            # Entries from the older {pushed_at, languages} format lack the
+            # ETag/body pair; refetch rather than fail on them.
+            if cached and "body" not in cached:
+                cached = None
+            if (
+                not force
+                and cached
+                and cached.get("pushed_at") == repo.get("pushed_at")
+            ):
+                jobs.append(cached)
+            elif repo.get("size") == 0 or repo.get("language") is None:
+                # Empty repos, or ones where GitHub detected no language at all,
+                # always return {} from languages_url.
+                jobs.append({"etag": None, "body": {}})
+            else:
+                jobs.append(executor.submit(fetch_language_data, repo, cached))
+
+        print(f"Processing {len(repos)} repositories...")
+        fetched = sum(isinstance(job, Future) for job in jobs)
+        print(f"Language cache: {len(jobs) - fetched} cached, {fetched} to fetch")
+
+        for i, (repo, job) in enumerate(zip(repos, jobs), 1):
+            repo_name = repo["name"]
+            if VERBOSE:
+                print(f"Processing {i}/{len(repos)}: {repo_name}")
+
+            try:
+                entry = job.result() if isinstance(job, Future) else job
+            except requests.exceptions.RequestException as e:
+                print(f"Warning: Could not fetch languages for {repo_name}: {e}")
+                if failed is not None:
+                    failed.append(repo_name)
+                continue
+            except Exception as e:
+                print(f"Error processing {repo_name}: {e}")
+                if failed is not None:
+                    failed.append(repo_name)
+                continue
+
+            new_cache[repo["full_name"]] = {
+                "pushed_at": repo.get("pushed_at"),
+                "etag": entry["etag"],
+                "body": entry["body"],
+            }
+            yield repo_name, entry["body"]
+
+    save_json_cache(LANGUAGES_CACHE_FILE, new_cache)
+
+
+def iter_languages_graphql():
+    """Yield (repo_name, languages) for the token owner's repositories.
+
+    Uses the GraphQL API, which returns language sizes for up to 100
+    repositories per request instead of one REST call per repository.
+    Forks and archived repositories are filtered out server-side, matching
+    iter_repos().
+    """
+    query = """
+    query($cursor: String) {
+      viewer {
+        repositories(
+          first: 100
+          after: $cursor
+          ownerAffiliations: OWNER
+          isFork: false
+          isArchived: false
+        ) {
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          nodes {
+            name
+            languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+              edges {
+                size
+                node {
+                  name
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    who = USERNAME or "<authenticated user>"
+    print(f"Fetching repository languages via GraphQL for user: {who}")
+
+    cursor = None
+    page = 1
+    while True:
+        repositories = _gql(query, {"cursor": cursor})["viewer"]["repositories"]
+        nodes = repositories["nodes"]
+        print(f"Page {page}: {len(nodes)} active repos")
+
+        for node in nodes:
+            yield node["name"], {
+                edge["node"]["name"]: edge["size"]
+                for edge in node["languages"]["edges"]
+            }
+
+        page_info = repositories["pageInfo"]
+        if not page_info["hasNextPage"]:
+            break
+        cursor = page_info["endCursor"]
+        page += 1
+
+
+@lru_cache(maxsize=256)
+def is_excluded(lang: str) -> bool:
+    """Whether a language name matches EXCLUDED_LANGS, case-insensitively."""
+    return lang.lower() in EXCLUDED_LANGS
+
+
+def _sum_languages(repo_langs):
+    """Total (repo_name, languages) pairs into a Counter, minus EXCLUDED_LANGS."""
+    totals = Counter()
+    excluded = 0
+
+    for repo_name, langs in repo_langs:
+        if not EXCLUDED_LANGS:
+            totals.update(langs)
             continue
+        kept = {
+            lang: size
+            for lang, size in langs.items()
+            if not is_excluded(lang)
+        }
+        if len(kept) != len(langs):
+            excluded += len(langs) - len(kept)
+            if VERBOSE:
+                for lang in langs:
+                    if lang not in kept:
+                        print(f"  Excluding {lang} from {repo_name}")
+        totals.update(kept)
+
+    if excluded:
+        print(f"Excluded {excluded} language entries matching EXCLUDED_LANGS")
+    return totals
+
+
+def iter_languages(force=False, failed=None):
+    """Yield (repo_name, languages) for every active repository.
+
+    With USE_GRAPHQL (the default when GH_TOKEN is set) this uses the batched
+    GraphQL query, falling back to the cached REST endpoints if it fails.
+    GraphQL results are only yielded once the whole listing has succeeded, so
+    a failure part-way never mixes partial results with the REST ones.
+    ``force`` disables the REST path's unchanged-repository shortcut, and
+    ``failed`` collects repositories the REST path had to skip.
+    """
+    if USE_GRAPHQL:
+        try:
+            repo_langs = list(iter_languages_graphql())
+        # KeyError/TypeError cover a payload with missing or null fields, e.g.
+        # a null viewer or languages node.
+        except (
+            requests.exceptions.RequestException,
+            RuntimeError,
+            KeyError,
+            TypeError,
+        ) as e:
+            print(f"GraphQL language query failed ({e}), falling back to REST")
+        else:
+            yield from repo_langs
+            return
+
+    yield from iter_languages_rest(force=force, failed=failed)
+
+
+def aggregate_languages(force=False, failed=None):
+    """Aggregate language statistics across all repositories (see iter_languages)."""
+    totals = _sum_languages(iter_languages(force=force, failed=failed))
 
     print(f"Language aggregation complete. Found {len(totals)} languages.")
     return totals
 
 
-def generate_svg(top_langs, total_size, contribution_data=None):
+def _gql(query, variables=None, timeout=30, allow_partial=False):
+    """POST a GraphQL query through SESSION and return its ``data`` payload.
+
+    Raises on HTTP errors and on GraphQL ``errors``. With ``allow_partial``,
+    errors are printed and whatever data came back alongside them is returned.
+    """
+    response = gh_request(
+        "POST",
+        GRAPHQL_URL,
+        json={"query": query, "variables": variables or {}},
+        headers=_GQL_HEADERS,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    payload = response.json()
+
+    errors = payload.get("errors")
+    if errors:
+        if not (allow_partial and payload.get("data")):
+            raise RuntimeError(f"GraphQL errors: {errors}")
+        print(f"GraphQL errors: {errors}")
+
+    return payload.get("data") or {}
+
+
+def _apportion_widths(sizes, total_size, bar_width):
+    """Split bar_width into integer segments proportional to sizes.
+
+    Every non-empty segment gets at least 1px, and the rounding error is
+    spread over the segments with the largest (or smallest) remainders so
+    the widths add up to bar_width.
+    """
+    if total_size <= 0:
+        return [0] * len(sizes)
+
+    scale = bar_width / total_size
+    raw_widths = [size * scale for size in sizes]
+    int_widths = [max(1, round(raw)) if raw > 0 else 0 for raw in raw_widths]
+
+    diff = bar_width - sum(int_widths)
+    if diff == 0:
+        return int_widths
+
+    fracs = [rw - iw for rw, iw in zip(raw_widths, int_widths)]
+    if diff > 0:
+        for idx in sorted(range(len(fracs)), key=fracs.__getitem__, reverse=True):
+            if diff <= 0:
+                break
+            if int_widths[idx] > 0:
+                int_widths[idx] += 1
+                diff -= 1
+    else:
+        for idx in sorted(range(len(fracs)), key=fracs.__getitem__):
+            if diff >= 0:
+                break
+            if int_widths[idx] > 1:
+                int_widths[idx] -= 1
+                diff += 1
+
+    return int_widths
+
+
+_STYLE_LINES = (
+    f".bg-primary {{ fill: {COLORS.bg_primary}; }}",
+    f".bg-secondary {{ fill: {COLORS.bg_secondary}; }}",
+    f".fg-primary {{ fill: {COLORS.fg_primary}; }}",
+    f".fg-secondary {{ fill: {COLORS.fg_secondary}; }}",
+    f".border {{ stroke: {COLORS.border}; }}",
+    ".font-title { font-family: 'Courier New', monospace; font-size: 18px; font-weight: bold; }",
+    ".font-lang { font-family: 'Courier New', monospace; font-size: 13px; }",
+    ".font-percent { font-family: 'Courier New', monospace; font-size: 12px; }",
+    ".font-footer { font-family: 'Courier New', monospace; font-size: 10px; }",
+    ".stat-box { fill: #2a2a37; stroke: #3a3a47; stroke-width: 1; rx: 6; ry: 6; }",
+    ".stat-value { font-family: 'Courier New', monospace; font-size: 16px; font-weight: bold; }",
+    ".stat-label { font-family: 'Courier New', monospace; font-size: 10px; }",
+)
+_STYLE_BLOCK = "".join(f"{line}\n" for line in _STYLE_LINES)
+
+# Fixed SVG fragments, filled in with str.format() by generate_svg(). Every
+# fragment ends in "\n" except the closing tag, matching the old "\n".join.
+_SVG_OPEN_TMPL = (
+    '<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+    'xmlns="http://www.w3.org/2000/svg">\n'
+    "<defs>\n"
+    "<style>\n"
+)
+_LANG_STYLE_TMPL = ".{class_name} {{ fill: {color}; }}\n"
+_SVG_HEADER_TMPL = (
+    "</style>\n"
+    '<clipPath id="barClip">'
+    '<rect x="{bar_x}" y="{bar_y}" width="{bar_width}" height="{bar_height}" rx="4" ry="4"/>'
+    "</clipPath>\n"
+    "</defs>\n"
+    f'<rect width="{{width}}" height="{{height}}" fill="{COLORS.bg_primary}" rx="12"/>\n'
+    '<rect x="8" y="8" width="{inner_width}" height="{inner_height}" '
+    f'fill="none" stroke="{COLORS.border}" stroke-width="2" rx="8"/>\n'
+    "\n"
+    '        <text x="{center_x}" y="35" text-anchor="middle"\n'
+    f'              fill="{COLORS.fg_primary}" class="font-title">\n'
+    '            <tspan x="{center_x}" dy="0">Most Used Languages</tspan>\n'
+    '            <tspan x="{center_x}" dy="1.2em">(Public and Private Repositories)</tspan>\n'
+    "        </text>\n"
+    "        \n"
+    '<g id="language-bar" clip-path="url(#barClip)" shape-rendering="crispEdges">\n'
+)
+_BAR_SEGMENT_TMPL = (
+    '<rect x="{x}" y="{y}" width="{width}" height="{height}" class="{class_name}"/>\n'
+)
+_BAR_OVERLAY_TMPL = (
+    "</g>\n"
+    '<rect x="{bar_x}" y="{bar_y}" width="{bar_width}" height="{bar_height}" '
+    f'fill="{COLORS.bg_primary}" rx="4">\n'
+    '  <animate attributeName="width" from="{bar_width}" to="0" '
+    'dur="1.2s" fill="freeze"/>\n'
+    "</rect>\n"
+)
+_LEGEND_ROW_TMPL = (
+    '<g transform="translate({x}, {y})">\n'
+    '<circle cx="8" cy="-3" r="5" class="{class_name}"/>\n'
+    '<text x="24" y="0" class="fg-primary font-lang">{lang}</text>\n'
+    '<text x="{percent_x}" y="0" class="fg-secondary font-percent" '
+    'text-anchor="end">{percent:.2f}%</text>\n'
+    "</g>\n"
+)
+_STAT_BOX_TMPL = (
+    '<rect x="{x}" y="{y}" width="{width}" height="{height}" class="stat-box"/>\n'
+    '<text x="{center_x}" y="{value_y}" text-anchor="middle" dominant-baseline="middle" '
+    'fill="{value_color}" class="stat-value">{value}</text>\n'
+    '<text x="{center_x}" y="{label_y}" text-anchor="middle" dominant-baseline="middle" '
+    f'fill="{COLORS.fg_secondary}" class="stat-label">{{label}}</text>\n'
+)
+_FOOTER_LINE_TMPL = (
+    '<line x1="60" y1="{y}" x2="{x2}" y2="{y}" '
+    f'stroke="{COLORS.border}" stroke-width="1"/>\n'
+)
+_FOOTER_USER_TMPL = (
+    '<text x="{center_x}" y="{y}" text-anchor="middle" class="fg-secondary font-footer">'
+    "Based on repository analysis • github.com/{username}</text>\n"
+)
+_FOOTER_THEME_TMPL = (
+    '<text x="{center_x}" y="{y}" text-anchor="middle" '
+    'class="fg-secondary font-footer" opacity="0.7">'
+    "Kanagawa Theme • Updated automatically</text>\n"
+    "</svg>"
+)
+
+
+def _stat_box(x, y, width, height, value, label, value_color):
+    """Render one contribution stat box (background, value and label)."""
+    return _STAT_BOX_TMPL.format(
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        center_x=x + width / 2,
+        value_y=y + 25,
+        label_y=y + 45,
+        value=value,
+        label=label,
+        value_color=value_color,
+    )
+
+
+def generate_svg(top_langs, total_size, contribution_data=None, out=None):
+    """Render the card SVG, writing it to ``out`` or returning it as a string."""
     svg_width = 600
     svg_height = 355 if contribution_data else 280
 
@@ -184,158 +772,78 @@ def generate_svg(top_langs, total_size, contribution_data=None):
     bar_x = (svg_width - bar_width) // 2
     bar_y = 85
 
-    style_lines = [
-        f'.bg-primary {{ fill: {COLORS["bg_primary"]}; }}',
-        f'.bg-secondary {{ fill: {COLORS["bg_secondary"]}; }}',
-        f'.fg-primary {{ fill: {COLORS["fg_primary"]}; }}',
-        f'.fg-secondary {{ fill: {COLORS["fg_secondary"]}; }}',
-        f'.border {{ stroke: {COLORS["border"]}; }}',
-        ".font-title { font-family: 'Courier New', monospace; font-size: 18px; font-weight: bold; }",
-        ".font-lang { font-family: 'Courier New', monospace; font-size: 13px; }",
-        ".font-percent { font-family: 'Courier New', monospace; font-size: 12px; }",
-        ".font-footer { font-family: 'Courier New', monospace; font-size: 10px; }",
-        ".stat-box { fill: #2a2a37; stroke: #3a3a47; stroke-width: 1; rx: 6; ry: 6; }",
-        ".stat-value { font-family: 'Courier New', monospace; font-size: 16px; font-weight: bold; }",
-        ".stat-label { font-family: 'Courier New', monospace; font-size: 10px; }",
+    # One (lang, size, class_name, color, percent) entry per language, shared by
+    # the style, bar and legend sections.
+    pct_scale = 100 / total_size if total_size else 0.0
+    lang_meta = [
+        (lang, size, lang_to_class(lang), lang_color(lang), size * pct_scale)
+        for lang, size in top_langs
     ]
 
-    for lang, _ in top_langs:
-        class_name = lang_to_class(lang)
-        color = COLORS["languages"].get(
-            lang, COLORS.get("accent", COLORS["fg_primary"])
-        )
-        style_lines.append(f".{class_name} {{ fill: {color}; }}")
-
-    svg_parts = [
-        f'<svg width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}" '
-        f'xmlns="http://www.w3.org/2000/svg">',
-        "<defs>",
-        "<style>",
-        *style_lines,
-        "</style>",
-        f'<clipPath id="barClip">'
-        f'<rect x="{bar_x}" y="{bar_y}" width="{bar_width}" height="{bar_height}" rx="4" ry="4"/>'
-        f"</clipPath>",
-        "</defs>",
-    ]
+    buf = io.StringIO() if out is None else None
+    write = (out or buf).write
 
-    svg_parts.append(
-        f'<rect width="{svg_width}" height="{svg_height}" '
-        f'fill="{COLORS["bg_primary"]}" rx="12"/>'
-    )
-    svg_parts.append(
-        f'<rect x="8" y="8" width="{svg_width-16}" height="{svg_height-16}" '
-        f'fill="none" stroke="{COLORS["border"]}" stroke-width="2" rx="8"/>'
-    )
+    write(_SVG_OPEN_TMPL.format(width=svg_width, height=svg_height))
+    write(_STYLE_BLOCK)
+    for _, _, class_name, color, _ in lang_meta:
+        write(_LANG_STYLE_TMPL.format(class_name=class_name, color=color))
 
-    svg_parts.append(
-        f"""
-        <text x="{svg_width/2}" y="35" text-anchor="middle"
-              fill="{COLORS['fg_primary']}" class="font-title">
-            <tspan x="{svg_width/2}" dy="0">Most Used Languages</tspan>
-            <tspan x="{svg_width/2}" dy="1.2em">(Public and Private Repositories)</tspan>
-        </text>
-        """
+    bar_geometry = {
+        "bar_x": bar_x,
+        "bar_y": bar_y,
+        "bar_width": bar_width,
+        "bar_height": bar_height,
+    }
+    write(
+        _SVG_HEADER_TMPL.format(
+            width=svg_width,
+            height=svg_height,
+            inner_width=svg_width - 16,
+            inner_height=svg_height - 16,
+            center_x=svg_width / 2,
+            **bar_geometry,
+        )
     )
 
-    if total_size <= 0:
-        int_widths = [0] * len(top_langs)
-    else:
-        raw_widths = []
-        for _, size in top_langs:
-            proportion = size / total_size
-            raw = proportion * bar_width
-            raw_widths.append(raw)
-
-        int_widths = []
-        for raw in raw_widths:
-            if raw <= 0:
-                int_widths.append(0)
-            else:
-                w_int = int(round(raw))
-                if w_int < 1:
-                    w_int = 1
-                int_widths.append(w_int)
-
-        total_int = sum(int_widths)
-        diff = bar_width - total_int
-
-        if diff != 0 and len(int_widths) > 0:
-            fracs = [rw - iw for rw, iw in zip(raw_widths, int_widths)]
-            if diff > 0:
-                order = sorted(
-                    range(len(int_widths)), key=lambda i: fracs[i], reverse=True
-                )
-                for idx in order:
-                    if diff <= 0:
-                        break
-                    if int_widths[idx] > 0:
-                        int_widths[idx] += 1
-                        diff -= 1
-            else:
-                order = sorted(range(len(int_widths)), key=lambda i: fracs[i])
-                for idx in order:
-                    if diff >= 0:
-                        break
-                    if int_widths[idx] > 1:
-                        int_widths[idx] -= 1
-                        diff += 1
-
-    current_x = bar_x
-    svg_parts.append(
-        f'<g id="language-bar" clip-path="url(#barClip)" shape-rendering="crispEdges">'
+    int_widths = _apportion_widths(
+        [size for _, size, _, _, _ in lang_meta], total_size, bar_width
     )
 
-    for (lang, _), segment_width in zip(top_langs, int_widths):
+    current_x = bar_x
+    for (_, _, class_name, _, _), segment_width in zip(lang_meta, int_widths):
         if segment_width <= 0:
             continue
-
-        class_name = lang_to_class(lang)
-
-        svg_parts.append(
-            f'<rect x="{current_x}" y="{bar_y}" width="{segment_width}" '
-            f'height="{bar_height}" class="{class_name}"/>'
+        write(
+            _BAR_SEGMENT_TMPL.format(
+                x=current_x,
+                y=bar_y,
+                width=segment_width,
+                height=bar_height,
+                class_name=class_name,
+            )
         )
-
         current_x += segment_width
 
-    svg_parts.append("</g>")
-
-    svg_parts.append(
-        f'<rect x="{bar_x}" y="{bar_y}" width="{bar_width}" height="{bar_height}" '
-        f'fill="{COLORS["bg_primary"]}" rx="4">'
-    )
-    svg_parts.append(
-        f'  <animate attributeName="width" from="{bar_width}" to="0" '
-        f'dur="1.2s" fill="freeze"/>'
-    )
-    svg_parts.append("</rect>")
+    write(_BAR_OVERLAY_TMPL.format(**bar_geometry))
 
     legend_start_y = bar_y + bar_height + 25
     col_width = bar_width / 2
     row_height = 22
-    items_per_col = (len(top_langs) + 1) // 2
-
-    for i, (lang, size) in enumerate(top_langs):
-        percent = (size / total_size) * 100 if total_size else 0.0
-        class_name = lang_to_class(lang)
+    items_per_col = (len(lang_meta) + 1) // 2
 
+    for i, (lang, _, class_name, _, percent) in enumerate(lang_meta):
         col = i // items_per_col
         row = i % items_per_col
-
-        x_col_left = bar_x + (col * col_width)
-        y = legend_start_y + (row * row_height)
-
-        svg_parts.append(f'<g transform="translate({x_col_left}, {y})">')
-        svg_parts.append(f'<circle cx="8" cy="-3" r="5" class="{class_name}"/>')
-        svg_parts.append(
-            f'<text x="24" y="0" class="fg-primary font-lang">{lang}</text>'
-        )
-        svg_parts.append(
-            f'<text x="{col_width - 4}" y="0" class="fg-secondary font-percent" '
-            f'text-anchor="end">{percent:.2f}%</text>'
+        write(
+            _LEGEND_ROW_TMPL.format(
+                x=bar_x + (col * col_width),
+                y=legend_start_y + (row * row_height),
+                class_name=class_name,
+                lang=lang,
+                percent_x=col_width - 4,
+                percent=percent,
+            )
         )
-        svg_parts.append("</g>")
 
     if contribution_data:
 
@@ -344,96 +852,133 @@ def generate_svg(top_langs, total_size, contribution_data=None):
         box_height = 65
         spacing = (svg_width - 3 * box_width) // 4
 
-        x_pos = spacing
         y_pos = stats_start_y
+        stats = [
+            (
+                f'{contribution_data["total_contributions"]:,}',
+                "TOTAL CONTRIBUTIONS",
+                COLORS.fg_primary,
+            ),
+            (
+                f'{contribution_data["current_streak"]} DAYS',
+                "CURRENT STREAK",
+                COLORS.accent,
+            ),
+            (
+                f'{contribution_data["longest_streak"]} DAYS',
+                "LONGEST STREAK",
+                COLORS.fg_primary,
+            ),
+        ]
 
-        svg_parts.append(
-            f'<rect x="{x_pos}" y="{y_pos}" width="{box_width}" height="{box_height}" class="stat-box"/>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 25}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["fg_primary"]}" class="stat-value">{contribution_data["total_contributions"]:,}</text>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 45}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["fg_secondary"]}" class="stat-label">TOTAL CONTRIBUTIONS</text>'
-        )
+        for i, (value, label, color) in enumerate(stats):
+            x_pos = spacing + i * (box_width + spacing)
+            write(_stat_box(x_pos, y_pos, box_width, box_height, value, label, color))
 
-        x_pos += box_width + spacing
+        footer_y = y_pos + box_height + 15
+    else:
+        footer_y = legend_start_y + (items_per_col * row_height) + 15
 
-        svg_parts.append(
-            f'<rect x="{x_pos}" y="{y_pos}" width="{box_width}" height="{box_height}" class="stat-box"/>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 25}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["accent"]}" class="stat-value">{contribution_data["current_streak"]} DAYS</text>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 45}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["fg_secondary"]}" class="stat-label">CURRENT STREAK</text>'
+    center_x = svg_width / 2
+    write(_FOOTER_LINE_TMPL.format(y=footer_y, x2=svg_width - 60))
+    if USERNAME:
+        write(
+            _FOOTER_USER_TMPL.format(
+                center_x=center_x, y=footer_y + 18, username=USERNAME
+            )
         )
+    write(_FOOTER_THEME_TMPL.format(center_x=center_x, y=footer_y + 33))
 
-        x_pos += box_width + spacing
+    return buf.getvalue() if buf is not None else None
 
-        svg_parts.append(
-            f'<rect x="{x_pos}" y="{y_pos}" width="{box_width}" height="{box_height}" class="stat-box"/>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 25}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["fg_primary"]}" class="stat-value">{contribution_data["longest_streak"]} DAYS</text>'
-        )
-        svg_parts.append(
-            f'<text x="{x_pos + box_width/2}" y="{y_pos + 45}" text-anchor="middle" dominant-baseline="middle" '
-            f'fill="{COLORS["fg_secondary"]}" class="stat-label">LONGEST STREAK</text>'
-        )
 
-        footer_y = y_pos + box_height + 15
-    else:
-        footer_y = legend_start_y + (items_per_col * row_height) + 15
+def load_contribution_cache():
+    """Load cached contribution data from file."""
+    return load_json_cache(CACHE_FILE)
 
-    svg_parts.append(
-        f'<line x1="60" y1="{footer_y}" x2="{svg_width-60}" y2="{footer_y}" '
-        f'stroke="{COLORS["border"]}" stroke-width="1"/>'
-    )
 
-    if USERNAME:
-        svg_parts.append(
-            f'<text x="{svg_width/2}" y="{footer_y + 18}" text-anchor="middle" '
-            f'class="fg-secondary font-footer">'
-            f"Based on repository analysis • github.com/{USERNAME}"
-            f"</text>"
-        )
+def save_contribution_cache(cache_data):
+    """Save contribution data to cache file."""
+    save_json_cache(CACHE_FILE, cache_data)
 
-    svg_parts.append(
-        f'<text x="{svg_width/2}" y="{footer_y + 33}" text-anchor="middle" '
-        f'class="fg-secondary font-footer" opacity="0.7">'
-        f"Kanagawa Theme • Updated automatically"
-        f"</text>"
-    )
 
-    svg_parts.append("</svg>")
+def _totals_source():
+    """Identify how totals were fetched, so other token scopes never share them.
 
-    return "\n".join(svg_parts)
+    The token is stored only as a truncated SHA-256 digest.
+    """
+    auth = hashlib.sha256(TOKEN.encode()).hexdigest()[:16] if TOKEN else None
+    return {"auth": auth, "graphql": USE_GRAPHQL}
+
+
+def load_cached_totals():
+    """Return language totals cached within CACHE_TTL_SECONDS, or None if stale."""
+    cache = load_json_cache(TOTALS_CACHE_FILE)
+    if (
+        cache.get("username") != USERNAME
+        or cache.get("excluded") != sorted(EXCLUDED_LANGS)
+        or cache.get("source") != _totals_source()
+        or time.time() - cache.get("ts", 0) >= CACHE_TTL_SECONDS
+    ):
+        return None
+    return cache.get("totals")
 
 
-def load_contribution_cache():
-    """Load cached contribution data from file."""
-    if CACHE_FILE.exists():
+def save_cached_totals(totals):
+    """Save aggregated language totals with a timestamp for load_cached_totals()."""
+    save_json_cache(
+        TOTALS_CACHE_FILE,
+        {
+            "username": USERNAME,
+            "excluded": sorted(EXCLUDED_LANGS),
+            "source": _totals_source(),
+            "ts": time.time(),
+            "totals": totals,
+        },
+    )
+
+
+def load_json_cache(path):
+    """Load a JSON cache file, returning an empty dict if missing or invalid."""
+    if path.exists():
         try:
-            with open(CACHE_FILE, "r") as f:
+            with open(path, "r") as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Warning: Could not load cache: {e}")
+            print(f"Warning: Could not load cache {path}: {e}")
     return {}
 
 
-def save_contribution_cache(cache_data):
-    """Save contribution data to cache file."""
+@contextmanager
+def atomic_writer(path, mode="wb"):
+    """Open a temp file next to path and os.replace() it into place on success.
+
+    Readers never see a partially written file; on error the temp file is removed.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    text_args = {} if "b" in mode else {"encoding": "utf-8", "newline": ""}
     try:
-        with open(CACHE_FILE, "w") as f:
-            json.dump(cache_data, f, indent=2)
+        with open(tmp_path, mode, **text_args) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_atomic(path, data):
+    """Write bytes to path atomically."""
+    with atomic_writer(path) as f:
+        f.write(data)
+
+
+def save_json_cache(path, cache_data):
+    """Atomically save a JSON cache file."""
+    try:
+        payload = json.dumps(cache_data, separators=(",", ":"))
+        write_atomic(path, payload.encode("utf-8"))
     except IOError as e:
-        print(f"Warning: Could not save cache: {e}")
+        print(f"Warning: Could not save cache {path}: {e}")
 
 
 def get_user_creation_date():
@@ -446,26 +991,8 @@ def get_user_creation_date():
     }
     """
 
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "User-Agent": "RepositoryScanner/1.0 (+https://github.com/mavantgarderc/RepositoryScanner)",
-    }
-
     try:
-        response = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": {"login": USERNAME}},
-            headers=headers,
-            timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        if "errors" in data:
-            print(f"GraphQL errors: {data['errors']}")
-            return None
-
-        user_data = data["data"]["user"]
+        user_data = _gql(query, {"login": USERNAME}).get("user")
         if not user_data:
             print(f"User '{USERNAME}' not found")
             return None
@@ -480,98 +1007,96 @@ def get_user_creation_date():
         return None
 
 
-def fetch_year_contributions(year):
-    """Fetch contribution data for a specific year."""
-    from_date = datetime(year, 1, 1, 0, 0, 0)
-    to_date = datetime(year, 12, 31, 23, 59, 59)
+def fetch_years_contributions(years):
+    """Fetch contribution data for several years, YEARS_PER_QUERY per request.
 
-    query = """
-    query($login: String!, $from: DateTime!, $to: DateTime!) {
-      user(login: $login) {
-        contributionsCollection(from: $from, to: $to) {
-          totalCommitContributions
-          totalIssueContributions
-          totalPullRequestContributions
-          totalPullRequestReviewContributions
-          contributionCalendar {
-            totalContributions
-            weeks {
-              contributionDays {
-                date
-                contributionCount
-              }
-            }
-          }
-        }
-      }
-    }
+    Returns ``{year: collection}``; years that failed are missing from the
+    result. A failed batch is retried one year at a time, so one bad year
+    or a timeout on a large batch never loses the others.
     """
+    results = {}
+    for start in range(0, len(years), YEARS_PER_QUERY):
+        batch = years[start : start + YEARS_PER_QUERY]
+        fetched = _fetch_years_batch(batch)
+        missing = [year for year in batch if year not in fetched]
+        if missing and len(batch) > 1:
+            print(f"Retrying years {missing} one at a time")
+            for year in missing:
+                fetched.update(_fetch_years_batch([year]))
+        results.update(fetched)
+    return results
+
+
+def _fetch_years_batch(years):
+    """Fetch several years in one GraphQL request via aliased fields.
+
+    Each year is requested as ``y{year}: contributionsCollection``.
+    """
+    if not years:
+        return {}
 
-    variables = {
-        "login": USERNAME,
-        "from": from_date.isoformat(),
-        "to": to_date.isoformat(),
-    }
-
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "User-Agent": "RepositoryScanner/1.0 (+https://github.com/mavantgarderc/RepositoryScanner)",
-    }
-
-    try:
-        response = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=headers,
-            timeout=30,
+    params = ["$login: String!"]
+    selections = []
+    variables = {"login": USERNAME}
+    for year in years:
+        params.append(f"$from{year}: DateTime!, $to{year}: DateTime!")
+        selections.append(
+            f"    y{year}: contributionsCollection(from: $from{year}, to: $to{year}) "
+            f"{{{_CONTRIBUTION_FIELDS}}}"
         )
-        response.raise_for_status()
-        data = response.json()
-
-        if "errors" in data:
-            print(f"GraphQL errors for {year}: {data['errors']}")
-            return None
+        variables[f"from{year}"] = datetime(year, 1, 1, 0, 0, 0).isoformat()
+        variables[f"to{year}"] = datetime(year, 12, 31, 23, 59, 59).isoformat()
+
+    query = (
+        f"query({', '.join(params)}) {{\n"
+        f"  user(login: $login) {{\n"
+        + "\n".join(selections)
+        + "\n  }\n}"
+    )
 
-        user_data = data["data"]["user"]
+    try:
+        user_data = _gql(query, variables, timeout=60, allow_partial=True).get("user")
         if not user_data:
             print(f"User '{USERNAME}' not found")
-            return None
+            return {}
 
-        return user_data["contributionsCollection"]
+        return {
+            year: user_data[f"y{year}"]
+            for year in years
+            if user_data.get(f"y{year}")
+        }
 
     except Exception as e:
-        print(f"Error fetching contributions for {year}: {e}")
-        return None
+        print(f"Error fetching contributions for {years}: {e}")
+        return {}
+
+
+_CONTRIBUTION_TYPES = (
+    "totalCommitContributions",
+    "totalIssueContributions",
+    "totalPullRequestContributions",
+    "totalPullRequestReviewContributions",
+)
 
 
-def merge_years_data(years_data):
-    """Merge contribution data from multiple years."""
+def merge_years_data(years_data, all_types_data):
+    """Merge cached per-year calendars and contribution-type totals."""
     all_weeks = []
     total_calendar_contributions = 0
-    total_commit = 0
-    total_issue = 0
-    total_pr = 0
-    total_review = 0
+    type_totals = dict.fromkeys(_CONTRIBUTION_TYPES, 0)
 
     for year, data in sorted(years_data.items()):
-        if not data:
-            continue
+        all_weeks.extend(data["weeks"])
+        total_calendar_contributions += data["totalContributions"]
 
-        calendar = data["contributionCalendar"]
-        all_weeks.extend(calendar["weeks"])
-        total_calendar_contributions += calendar["totalContributions"]
-        total_commit += data["totalCommitContributions"]
-        total_issue += data["totalIssueContributions"]
-        total_pr += data["totalPullRequestContributions"]
-        total_review += data["totalPullRequestReviewContributions"]
+        year_types = all_types_data.get(year, {})
+        for key in _CONTRIBUTION_TYPES:
+            type_totals[key] += year_types.get(key, 0)
 
     return {
         "weeks": all_weeks,
         "total_contributions": total_calendar_contributions,
-        "totalCommitContributions": total_commit,
-        "totalIssueContributions": total_issue,
-        "totalPullRequestContributions": total_pr,
-        "totalPullRequestReviewContributions": total_review,
+        **type_totals,
     }
 
 
@@ -602,12 +1127,11 @@ def get_contribution_data():
 
     print(f"Years to fetch: {years_to_fetch}")
 
-    rate_limit_remaining = None
-    for i, year in enumerate(years_to_fetch):
-        year_str = str(year)
-        print(f"Fetching {year}... ({i+1}/{len(years_to_fetch)})")
+    results = fetch_years_contributions(years_to_fetch)
 
-        data = fetch_year_contributions(year)
+    for year in years_to_fetch:
+        year_str = str(year)
+        data = results.get(year)
         if data:
             years_data[year_str] = {
                 "weeks": data["contributionCalendar"]["weeks"],
@@ -615,60 +1139,24 @@ def get_contribution_data():
                     "totalContributions"
                 ],
             }
-            all_types_data[year_str] = {
-                "totalCommitContributions": data["totalCommitContributions"],
-                "totalIssueContributions": data["totalIssueContributions"],
-                "totalPullRequestContributions": data["totalPullRequestContributions"],
-                "totalPullRequestReviewContributions": data[
-                    "totalPullRequestReviewContributions"
-                ],
-            }
-
-            save_contribution_cache(
-                {
-                    "years": years_data,
-                    "all_types": all_types_data,
-                    "last_updated": datetime.now().isoformat(),
-                }
-            )
+            all_types_data[year_str] = {key: data[key] for key in _CONTRIBUTION_TYPES}
         else:
             print(f"Warning: Failed to fetch data for {year}")
 
-        if i < len(years_to_fetch) - 1:
-            time.sleep(1)
-
-    merged = merge_years_data(
-        {
-            year: {
-                "contributionCalendar": {
-                    "weeks": data["weeks"],
-                    "totalContributions": data["totalContributions"],
-                },
-                "totalCommitContributions": all_types_data.get(year, {}).get(
-                    "totalCommitContributions", 0
-                ),
-                "totalIssueContributions": all_types_data.get(year, {}).get(
-                    "totalIssueContributions", 0
-                ),
-                "totalPullRequestContributions": all_types_data.get(year, {}).get(
-                    "totalPullRequestContributions", 0
-                ),
-                "totalPullRequestReviewContributions": all_types_data.get(year, {}).get(
-                    "totalPullRequestReviewContributions", 0
-                ),
+    if years_to_fetch:
+        save_contribution_cache(
+            {
+                "years": years_data,
+                "all_types": all_types_data,
+                "last_updated": datetime.now().isoformat(),
             }
-            for year, data in years_data.items()
-        }
-    )
+        )
+
+    merged = merge_years_data(years_data, all_types_data)
 
     current_streak, longest_streak = calculate_streaks_all_time(merged["weeks"])
 
-    all_types_total = (
-        merged["totalCommitContributions"]
-        + merged["totalIssueContributions"]
-        + merged["totalPullRequestContributions"]
-        + merged["totalPullRequestReviewContributions"]
-    )
+    all_types_total = sum(merged[key] for key in _CONTRIBUTION_TYPES)
 
     contribution_data = {
         "total_contributions": merged["total_contributions"],
@@ -699,26 +1187,12 @@ def get_contribution_data_fallback():
     to_date = datetime.now()
     from_date = to_date - timedelta(days=365)
 
-    query = """
-    query($login: String!, $from: DateTime!, $to: DateTime!) {
-      user(login: $login) {
-        contributionsCollection(from: $from, to: $to) {
-          totalCommitContributions
-          totalIssueContributions
-          totalPullRequestContributions
-          totalPullRequestReviewContributions
-          contributionCalendar {
-            totalContributions
-            weeks {
-              contributionDays {
-                date
-                contributionCount
-              }
-            }
-          }
-        }
-      }
-    }
+    query = f"""
+    query($login: String!, $from: DateTime!, $to: DateTime!) {{
+      user(login: $login) {{
+        contributionsCollection(from: $from, to: $to) {{{_CONTRIBUTION_FIELDS}}}
+      }}
+    }}
     """
 
     variables = {
@@ -727,26 +1201,8 @@ def get_contribution_data_fallback():
         "to": to_date.isoformat(),
     }
 
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "User-Agent": "RepositoryScanner/1.0 (+https://github.com/mavantgarderc/RepositoryScanner)",
-    }
-
     try:
-        response = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=headers,
-            timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        if "errors" in data:
-            print(f"GraphQL errors: {data['errors']}")
-            return None
-
-        user_data = data["data"]["user"]
+        user_data = _gql(query, variables).get("user")
         if not user_data:
             print(f"User '{USERNAME}' not found")
             return None
@@ -785,57 +1241,53 @@ def get_contribution_data_fallback():
 def calculate_streaks_all_time(weeks):
     """Calculate current and longest streaks from all-time contribution data."""
 
-    all_days = []
-    for week in weeks:
-        for day in week["contributionDays"]:
-            all_days.append(
-                {
-                    "date": datetime.strptime(day["date"], "%Y-%m-%d"),
-                    "count": day["contributionCount"],
-                }
-            )
+    # Day ordinals turn "is this the next calendar day?" into an integer
+    # comparison, so the scans below need no date/timedelta arithmetic.
+    all_days = [
+        (date.fromisoformat(day["date"]).toordinal(), day["contributionCount"])
+        for week in weeks
+        for day in week["contributionDays"]
+    ]
 
-    all_days.sort(key=lambda x: x["date"])
+    # Calendars arrive in date order, so this is a single linear Timsort pass;
+    # it only reorders anything if merged years came back out of order.
+    all_days.sort(key=itemgetter(0))
 
     if not all_days:
         return 0, 0
 
-    date_map = {day["date"].date(): day["count"] for day in all_days}
-
-    start_date = min(date_map.keys())
-    end_date = max(date_map.keys())
-
     longest_streak = 0
     temp_streak = 0
-    current_date = start_date
+    prev_day = None
 
-    while current_date <= end_date:
-        has_contributions = date_map.get(current_date, 0) > 0
+    for day, count in all_days:
+        if day == prev_day:
+            continue
 
-        if has_contributions:
-            temp_streak += 1
+        if count > 0:
+            if temp_streak > 0 and day == prev_day + 1:
+                temp_streak += 1
+            else:
+                temp_streak = 1
+            longest_streak = max(longest_streak, temp_streak)
         else:
-            if temp_streak > 0:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 0
+            temp_streak = 0
 
-        current_date += timedelta(days=1)
+        prev_day = day
 
-    if temp_streak > 0:
-        longest_streak = max(longest_streak, temp_streak)
-
-    today = datetime.now().date()
-    one_year_ago = today - timedelta(days=365)
+    today = date.today().toordinal()
+    one_year_ago = today - 365
 
     current_streak = 0
-    check_date = today
+    expected_day = today
 
-    while check_date >= one_year_ago and check_date >= start_date:
-        if date_map.get(check_date, 0) > 0:
-            current_streak += 1
-        else:
+    for day, count in reversed(all_days):
+        if day > expected_day:
+            continue
+        if day != expected_day or day < one_year_ago or count <= 0:
             break
-        check_date -= timedelta(days=1)
+        current_streak += 1
+        expected_day = day - 1
 
     return current_streak, longest_streak
 
@@ -845,8 +1297,33 @@ def calculate_streaks(weeks):
     return calculate_streaks_all_time(weeks)
 
 
-def main():
+def _parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Generate the language and contribution statistics SVG."
+    )
+    parser.add_argument(
+        "--force-refresh",
+        "--force",
+        dest="force_refresh",
+        action="store_true",
+        help="ignore cached language totals and unchanged-repo shortcuts",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="print per-repository progress (same as VERBOSE=1)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main function to orchestrate the language statistics and contribution data generation."""
+    global VERBOSE
+
+    args = _parse_args(argv)
+    VERBOSE = VERBOSE or args.verbose
     print("Starting language statistics and contribution data generation...")
 
     if not TOKEN:
@@ -862,29 +1339,51 @@ def main():
             return 1
 
     try:
-
-        langs = aggregate_languages()
-        total_size = sum(langs.values())
-
-        if total_size == 0:
-            print("Error: No language data found!")
-            return 1
-
-        top_langs = sorted(langs.items(), key=lambda x: x[1], reverse=True)[:TOP_N]
-
-        print(f"\nTop {TOP_N} languages (by byte size):")
-        for lang, size in top_langs:
-            percent = (size / total_size) * 100
-            print(f"  {lang}: {size:,} bytes ({percent:.2f}%)")
-
-        contribution_data = get_contribution_data()
-
-        svg_content = generate_svg(top_langs, total_size, contribution_data)
+        # The contribution calendar does not depend on the language totals, so
+        # fetch it on a background thread while the repositories are scanned.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            contributions = executor.submit(get_contribution_data)
+
+            langs = None if args.force_refresh else load_cached_totals()
+            if langs:
+                print("Using cached language totals (pass --force-refresh to rebuild)")
+            else:
+                failed = []
+                langs = aggregate_languages(force=args.force_refresh, failed=failed)
+                # Partial totals would be served for the whole TTL, so only
+                # cache a run where every repository was fetched.
+                if failed:
+                    print(
+                        f"Not caching language totals: {len(failed)} "
+                        "repositories could not be fetched"
+                    )
+                else:
+                    save_cached_totals(langs)
+            total_size = sum(langs.values())
+
+            if total_size == 0:
+                print("Error: No language data found!")
+                return 1
+
+            top_n = min(TOP_N, len(langs))
+            top_langs = heapq.nlargest(top_n, langs.items(), key=itemgetter(1))
+
+            # Same scale generate_svg() uses, so the log matches the legend.
+            pct_scale = 100 / total_size
+            print(f"\nTop {top_n} languages (by byte size):")
+            for lang, size in top_langs:
+                print(f"  {lang}: {size:,} bytes ({size * pct_scale:.2f}%)")
+
+            contribution_data = contributions.result()
 
         os.makedirs(os.path.dirname(SVG_PATH), exist_ok=True)
-
-        with open(SVG_PATH, "w", encoding="utf-8") as f:
-            f.write(svg_content)
+        with atomic_writer(SVG_PATH, "w") as f:
+            generate_svg(top_langs, total_size, contribution_data, out=f)
+        if GZIP_OUTPUT:
+            # mtime=0 keeps the archive byte-stable when the SVG has not changed.
+            svg_bytes = Path(SVG_PATH).read_bytes()
+            write_atomic(SVG_PATH + ".gz", gzip.compress(svg_bytes, 9, mtime=0))
+            print(f"Gzipped copy written to {SVG_PATH}.gz")
 
         print(f"\nSVG successfully written to {SVG_PATH}")
         print(f"Total code size analyzed (bytes): {total_size:,}")
@@ -902,6 +1401,9 @@ def main():
         traceback.print_exc()
         return 1
 
+    finally:
+        SESSION.close()
+
 
 if __name__ == "__main__":
     sys.exit(main())
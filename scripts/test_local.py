@@ -1,37 +1,87 @@
 #!/usr/bin/env python3
 
+import argparse
+import heapq
 import os
 import sys
+from collections import Counter
+from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
 
+# Written after every online run; --offline renders from it without the API.
+# Kept out of assets/ (and gitignored) since it lists private repository names.
+STATS_PATH = Path(".test_local_stats.json")
 
-def setup_test_environment():
 
-    username = input("Enter your GitHub username: ").strip()
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate assets/languages.svg locally.",
+        epilog="Options that are not given fall back to the matching environment "
+        "variable, then to an interactive prompt when stdin is a terminal.",
+    )
+    parser.add_argument("--username", help="GitHub username (GITHUB_USERNAME)")
+    parser.add_argument("--token", help="GitHub personal access token (GH_TOKEN)")
+    parser.add_argument(
+        "--excluded", help="comma-separated languages to exclude (EXCLUDED_LANGS)"
+    )
+    parser.add_argument("--top", help="number of top languages to show (TOP_LANGS)")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=f"reuse {STATS_PATH} from the last online run instead of calling GitHub",
+    )
+    parser.add_argument(
+        "--no-browser",
+        action="store_true",
+        help="do not offer to open the generated SVG in a browser",
+    )
+    return parser.parse_args(argv)
+
+
+def _option(value, env_name):
+    """Return the command-line value, else the environment's, else None."""
+    if value is None:
+        value = os.getenv(env_name)
+    return value.strip() if value is not None else None
+
+
+def setup_test_environment(args):
+    interactive = sys.stdin.isatty()
+
+    username = _option(args.username, "GITHUB_USERNAME")
+    if username is None and interactive:
+        username = input("Enter your GitHub username: ").strip()
     if not username:
-        print("Username is required")
+        print("Username is required (pass --username or set GITHUB_USERNAME)")
         sys.exit(1)
 
-    print("\nGitHub Personal Access Token:")
-    print("   - For public repos only: press Enter to skip")
-    print("   - For complete data: create token at https://github.com/settings/tokens")
-    print(
-        "   - Token needs 'repo' scope for private repos, or no scopes for public only"
-    )
+    token = _option(args.token, "GH_TOKEN")
+    if token is None and interactive:
+        print("\nGitHub Personal Access Token:")
+        print("   - For public repos only: press Enter to skip")
+        print("   - For complete data: create token at https://github.com/settings/tokens")
+        print(
+            "   - Token needs 'repo' scope for private repos, or no scopes for public only"
+        )
 
-    token = input("Enter your GitHub token (or press Enter to skip): ").strip()
+        token = input("Enter your GitHub token (or press Enter to skip): ").strip()
 
-    print("\nExcluded languages (optional):")
-    print("   - Enter comma-separated languages to exclude (e.g., HTML,CSS,Dockerfile)")
-    print("   - Or press Enter to include all languages")
+    excluded = _option(args.excluded, "EXCLUDED_LANGS")
+    if excluded is None and interactive:
+        print("\nExcluded languages (optional):")
+        print("   - Enter comma-separated languages to exclude (e.g., HTML,CSS,Dockerfile)")
+        print("   - Or press Enter to include all languages")
 
-    excluded = input("Excluded languages: ").strip()
+        excluded = input("Excluded languages: ").strip()
 
-    print("\nTop languages to show (optional):")
-    print("   - Enter a positive integer (e.g., 6, 8, 10)")
-    print("   - Press Enter to use the default (6)")
+    top_langs_input = _option(args.top, "TOP_LANGS")
+    if top_langs_input is None and interactive:
+        print("\nTop languages to show (optional):")
+        print("   - Enter a positive integer (e.g., 6, 8, 10)")
+        print("   - Press Enter to use the default (6)")
 
-    top_langs_input = input("Top languages (default 6): ").strip()
+        top_langs_input = input("Top languages (default 6): ").strip()
 
     os.environ["GITHUB_USERNAME"] = username
     os.environ["USERNAME"] = username
@@ -62,57 +112,64 @@ def setup_test_environment():
     return username, token
 
 
-def display_language_stats(langs_data, excluded_data, total_lines, excluded_total):
+def display_language_stats(
+    langs_data,
+    excluded_data,
+    langs_totals,
+    excluded_totals,
+    total_lines,
+    excluded_total,
+):
     if not langs_data and not excluded_data:
         print("No language data to display")
         return
 
-    print(f"\nLanguage Statistics")
-    print("=" * 50)
+    lines = []
+    out = lines.append
 
-    unique_repos = {
-        repo_name for repo_data in langs_data.values() for repo_name in repo_data
-    }
-    print(f"Total repositories analyzed: {len(unique_repos)}")
-    print(f"Total code size (bytes): {total_lines:,}")
-    print(f"Languages found: {len(langs_data)}")
+    out(f"\nLanguage Statistics")
+    out("=" * 50)
 
-    sorted_langs = sorted(
-        langs_data.items(), key=lambda x: sum(x[1].values()), reverse=True
-    )
+    unique_repos = set().union(*langs_data.values())
+    out(f"Total repositories analyzed: {len(unique_repos)}")
+    out(f"Total code size (bytes): {total_lines:,}")
+    out(f"Languages found: {len(langs_data)}")
+
+    sorted_langs = sorted(langs_totals.items(), key=itemgetter(1), reverse=True)
 
-    print(f"\nAll Languages:")
-    print("-" * 50)
+    out(f"\nAll Languages:")
+    out("-" * 50)
 
-    for lang, repo_data in sorted_langs:
-        lang_total = sum(repo_data.values())
+    for lang, lang_total in sorted_langs:
         percentage = (lang_total / total_lines) * 100 if total_lines else 0
-        print(f"{lang}: {lang_total:,} bytes ({percentage:.2f}%)")
+        out(f"{lang}: {lang_total:,} bytes ({percentage:.2f}%)")
 
     if excluded_data:
-        print(f"\nExcluded Languages:")
-        print("-" * 50)
+        out(f"\nExcluded Languages:")
+        out("-" * 50)
 
         sorted_excluded = sorted(
-            excluded_data.items(), key=lambda x: sum(x[1].values()), reverse=True
+            excluded_totals.items(), key=itemgetter(1), reverse=True
         )
+        total_with_excluded = total_lines + excluded_total
 
-        for lang, repo_data in sorted_excluded:
-            lang_total = sum(repo_data.values())
-            total_with_excluded = total_lines + excluded_total
+        for lang, lang_total in sorted_excluded:
             percentage = (
                 (lang_total / total_with_excluded) * 100 if total_with_excluded else 0
             )
-            print(f"{lang}: {lang_total:,} bytes ({percentage:.2f}%)")
+            out(f"{lang}: {lang_total:,} bytes ({percentage:.2f}%)")
 
-        print(f"\nTotal excluded bytes: {excluded_total:,}")
-        print(
+        out(f"\nTotal excluded bytes: {excluded_total:,}")
+        out(
             f"Total code size including excluded (bytes): "
             f"{total_lines + excluded_total:,}"
         )
 
+    # One write for the whole report instead of a print() per line.
+    sys.stdout.write("\n".join(lines) + "\n")
+
 
-def run_test_with_stats():
+def run_test_with_stats(offline=False, open_browser=True):
     print("\n" + "=" * 50)
     print("Running language stats generation...")
     print("=" * 50)
@@ -120,112 +177,145 @@ def run_test_with_stats():
     token = os.getenv("GH_TOKEN", "")
 
     try:
-        sys.path.insert(0, "scripts")
-
-        from fetch_languages import EXCLUDED_LANGS, TOP_N, get_language_data, get_repos, get_contribution_data
-
-        repos = get_repos()
-
-        langs_detailed = {}
-        excluded_detailed = {}
-        total_lines = 0
-        excluded_total = 0
+        import requests
+        from fetch_languages import (
+            TOP_N,
+            atomic_writer,
+            generate_svg,
+            get_contribution_data,
+            is_excluded,
+            iter_languages,
+            load_json_cache,
+            save_json_cache,
+        )
 
-        print(f"Processing {len(repos)} repositories...")
+        svg_path = Path("assets/languages.svg")
+        svg_path.parent.mkdir(parents=True, exist_ok=True)
 
-        for repo in repos:
+        if offline:
+            stats = load_json_cache(STATS_PATH)
             try:
-                langs = get_language_data(repo)
-                repo_name = repo["name"]
-
+                generated_at = stats["generated_at"]
+                langs_detailed = stats["langs_detailed"]
+                excluded_detailed = stats["excluded_detailed"]
+                langs_totals = stats["langs_totals"]
+                excluded_totals = stats["excluded_totals"]
+                total_lines = stats["total_lines"]
+                excluded_total = stats["excluded_total"]
+            except (KeyError, TypeError):
+                # Missing, truncated, or written by an older version of this script.
+                print(f"No saved stats in {STATS_PATH} - run once without --offline")
+                return False
+            print(f"Using stats saved at {generated_at} (offline)")
+        else:
+            langs_detailed = {}
+            excluded_detailed = {}
+            # Per-language byte totals, kept alongside the per-repo detail so the
+            # report and the SVG never have to re-sum it.
+            langs_totals = Counter()
+            excluded_totals = Counter()
+            total_lines = 0
+            excluded_total = 0
+
+            # Same source as fetch_languages.main(): batched GraphQL with a token,
+            # otherwise the cached REST path that skips unchanged repos on re-runs.
+            for repo_name, langs in iter_languages():
                 for lang, lines in langs.items():
-                    if lang.lower() in EXCLUDED_LANGS:
+                    if is_excluded(lang):
                         if lang not in excluded_detailed:
                             excluded_detailed[lang] = {}
                         excluded_detailed[lang][repo_name] = lines
+                        excluded_totals[lang] += lines
                         excluded_total += lines
                     else:
                         if lang not in langs_detailed:
                             langs_detailed[lang] = {}
                         langs_detailed[lang][repo_name] = lines
+                        langs_totals[lang] += lines
                         total_lines += lines
 
-            except Exception as e:
-                print(f"Error processing {repo['name']}: {e}")
-                continue
-
         if total_lines == 0 and excluded_total == 0:
             print("No language data found!")
             return False
 
+        if not offline:
+            generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            save_json_cache(
+                STATS_PATH,
+                {
+                    "generated_at": generated_at,
+                    "langs_detailed": langs_detailed,
+                    "excluded_detailed": excluded_detailed,
+                    "langs_totals": langs_totals,
+                    "excluded_totals": excluded_totals,
+                    "total_lines": total_lines,
+                    "excluded_total": excluded_total,
+                },
+            )
+
         display_language_stats(
-            langs_detailed, excluded_detailed, total_lines, excluded_total
+            langs_detailed,
+            excluded_detailed,
+            langs_totals,
+            excluded_totals,
+            total_lines,
+            excluded_total,
         )
 
         print(f"\nGenerating SVG...")
 
-        import fetch_languages
-
-        langs_simple = {}
-        for lang, repo_data in langs_detailed.items():
-            langs_simple[lang] = sum(repo_data.values())
-
-        top_langs = sorted(langs_simple.items(), key=lambda x: x[1], reverse=True)[
-            :TOP_N
-        ]
+        top_langs = heapq.nlargest(TOP_N, langs_totals.items(), key=itemgetter(1))
 
         contribution_data = None
-        if token:
+        if offline:
+            print("Skipping contribution data (offline)")
+        elif token:
             print("Fetching contribution data...")
-            contribution_data = fetch_languages.get_contribution_data()
+            contribution_data = get_contribution_data()
         else:
             print("Skipping contribution data (no token provided)")
 
-        svg_content = fetch_languages.generate_svg(top_langs, total_lines, contribution_data)
-
-        svg_path = Path("assets/languages.svg")
-        os.makedirs(svg_path.parent, exist_ok=True)
-
-        with open(svg_path, "w", encoding="utf-8") as f:
-            f.write(svg_content)
+        with atomic_writer(svg_path, "w") as f:
+            generate_svg(top_langs, total_lines, contribution_data, out=f)
 
         print("Script completed successfully!")
 
-        if svg_path.exists():
-            size = svg_path.stat().st_size
-            print(f"SVG created: {svg_path} ({size:,} bytes)")
+        # atomic_writer() raises if the file could not be written, so it exists.
+        size = svg_path.stat().st_size
+        print(f"SVG created: {svg_path} ({size:,} bytes)")
 
-            if contribution_data:
-                print(f"Total contributions: {contribution_data['total_contributions']:,}")
-                print(f"All types total: {contribution_data['all_types_total']:,}")
-                print(f"Years analyzed: {contribution_data.get('years_fetched', 1)}")
-                print(f"Current streak: {contribution_data['current_streak']} days")
-                print(f"Longest streak: {contribution_data['longest_streak']} days")
+        if contribution_data:
+            print(f"Total contributions: {contribution_data['total_contributions']:,}")
+            print(f"All types total: {contribution_data['all_types_total']:,}")
+            print(f"Years analyzed: {contribution_data.get('years_fetched', 1)}")
+            print(f"Current streak: {contribution_data['current_streak']} days")
+            print(f"Longest streak: {contribution_data['longest_streak']} days")
 
+        if open_browser and sys.stdin.isatty():
             import webbrowser
 
             choice = input("\nopen in browser? (y/n): ").lower()
             if choice == "y":
                 webbrowser.open(f"file://{svg_path.absolute()}")
-        else:
-            print("SVG file was not created")
 
     except ImportError as e:
         print(f"Could not import required modules: {e}")
         print(
             "Make sure fetch_languages.py and colors.py are in the scripts/ directory"
         )
-    except Exception as e:
+        return False
+    except (requests.exceptions.RequestException, RuntimeError, OSError) as e:
+        # API failures (after gh_request's rate-limit retries), GraphQL errors
+        # and file errors; anything else is a bug and keeps its traceback.
         print(f"Error running script: {e}")
-        import traceback
-
-        traceback.print_exc()
         return False
 
     return True
 
 
-def main():
+def main(argv=None):
+    args = _parse_args(argv)
+
     print("Local Language Stats Tester")
     print("=" * 30)
 
@@ -239,9 +329,17 @@ def main():
         print("Make sure colors.py is in the scripts/ directory")
         sys.exit(1)
 
-    username, token = setup_test_environment()
+    # fetch_languages reads its settings at import time, so it is imported
+    # lazily in run_test_with_stats(); the path only needs adding once.
+    scripts_dir = str(Path(__file__).resolve().parent)
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
 
-    success = run_test_with_stats()
+    username, token = setup_test_environment(args)
+
+    success = run_test_with_stats(
+        offline=args.offline, open_browser=not args.no_browser
+    )
 
     if success:
         print(f"\nTest completed! Check assets/languages.svg")